@@ -0,0 +1,80 @@
+import os
+import time
+import logging
+import threading
+import pymysql
+from dotenv import load_dotenv
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+FAILURE_THRESHOLD = int(os.getenv("DB_BREAKER_FAILURES", "3"))
+PROBE_INTERVAL = int(os.getenv("DB_BREAKER_PROBE_SECONDS", "15"))
+
+# Kode error MySQL yang berarti server tidak bisa dihubungi
+CONNECTION_ERRORS = {2003, 2006, 2013}
+
+# Database sedang dianggap mati; panggilan langsung ditolak tanpa menunggu timeout
+class CircuitOpenError(Exception):
+    pass
+
+def is_db_down(error):
+    if isinstance(error, CircuitOpenError):
+        return True
+    return isinstance(error, pymysql.err.OperationalError) and bool(error.args) and error.args[0] in CONNECTION_ERRORS
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, probe_interval=PROBE_INTERVAL):
+        self.failure_threshold = failure_threshold
+        self.probe_interval = probe_interval
+        self.failures = 0
+        self.is_open = False
+        self.opened_at = None
+        self.last_config = None
+        self._lock = threading.Lock()
+        self._probe = None
+
+    def connect(self, config):
+        if self.is_open:
+            raise CircuitOpenError("Database tidak tersedia (circuit breaker terbuka)")
+
+        self.last_config = config
+        try:
+            conn = pymysql.connect(**config)
+        except Exception as e:
+            if is_db_down(e):
+                self.record_failure()
+            raise
+        self.record_success()
+        return conn
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.is_open or self.failures < self.failure_threshold:
+                return
+            self.is_open = True
+            self.opened_at = time.time()
+            logger.error(f"Circuit breaker DB terbuka setelah {self.failures} kegagalan koneksi")
+            self._probe = threading.Thread(target=self._probe_loop, name="db-breaker-probe", daemon=True)
+            self._probe.start()
+
+    # Cek ulang koneksi di background sampai DB kembali hidup
+    def _probe_loop(self):
+        while self.is_open:
+            time.sleep(self.probe_interval)
+            try:
+                pymysql.connect(**self.last_config).close()
+            except Exception as e:
+                logger.info(f"Probe DB masih gagal: {e}")
+                continue
+            with self._lock:
+                self.is_open = False
+                self.failures = 0
+            logger.info("Koneksi DB pulih, circuit breaker ditutup")
+
+db_breaker = CircuitBreaker()
@@ -1,13 +1,24 @@
+import os
 import pymysql
+from dotenv import load_dotenv
 
-# Konfigurasi koneksi langsung ke database lokal
-CONFIG = {
-    'host': 'localhost',          # atau 127.0.0.1
-    'user': 'root',               # ganti dengan user DB kamu
-    'password': '',               # ganti dengan password DB kamu
-    'db': 'tlkm',                 # nama database
-    'cursorclass': pymysql.cursors.DictCursor
+from database.breaker import db_breaker
+
+load_dotenv()
+
+# Konfigurasi koneksi MySQL (satu-satunya sumber, dibaca dari .env)
+DB_CONFIG = {
+    "host": os.getenv("DB_HOST", "localhost"),
+    "user": os.getenv("DB_USER", "root"),
+    "password": os.getenv("DB_PASS", ""),
+    "database": os.getenv("DB_NAME", "tlkm"),
+    "cursorclass": pymysql.cursors.DictCursor,
+    "charset": "utf8mb4",
+    "connect_timeout": int(os.getenv("DB_CONNECT_TIMEOUT", "5")),
+    # Query yang menggantung gagal cepat (2013) dan ikut dihitung circuit breaker
+    "read_timeout": int(os.getenv("DB_READ_TIMEOUT", "30")),
+    "write_timeout": int(os.getenv("DB_WRITE_TIMEOUT", "30")),
 }
 
 def get_connection_database():
-    return pymysql.connect(**CONFIG)
+    return db_breaker.connect(DB_CONFIG)
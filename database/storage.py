@@ -0,0 +1,338 @@
+import os
+import sqlite3
+import logging
+import time
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from dotenv import load_dotenv
+
+from database.breaker import db_breaker, is_db_down
+from database.db import DB_CONFIG
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# "mysql" (default, dengan replika SQLite lokal) atau "sqlite" (tanpa server MySQL sama sekali)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "mysql").lower()
+SQLITE_PATH = os.getenv("SQLITE_PATH", "data/tlkm.sqlite3")
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+# Interval cek kesehatan MySQL di background (menentukan tanda "data replika" pada jawaban)
+PRIMARY_CHECK_SECONDS = int(os.getenv("PRIMARY_CHECK_SECONDS", "10"))
+
+# Kolom yang diindeks di SQLite per prefix tabel (lookup /cekftm dan /cekmetro)
+INDEX_COLUMNS = {
+    "data_ftm_": ("sto", "nama_gpon"),
+    "data_uplink_": ("sto", "gpon_hostname"),
+}
+
+def index_columns_for(table):
+    for prefix, columns in INDEX_COLUMNS.items():
+        if table.startswith(prefix):
+            return columns
+    return ()
+
+# SQL ditulis dengan gaya MySQL (backtick, %s); backend lain menerjemahkan placeholder
+class SQLStorage:
+    placeholder = "%s"
+
+    # timeout (detik): batas waktu query, lewat dari itu query dihentikan dan error dilempar
+    @contextmanager
+    def session(self, timeout=None):
+        raise NotImplementedError
+
+    def _sql(self, sql):
+        return sql if self.placeholder == "%s" else sql.replace("%s", self.placeholder)
+
+    def query(self, sql, params=(), timeout=None):
+        with self.session(timeout) as conn:
+            cur = conn.cursor()
+            cur.execute(self._sql(sql), params)
+            rows = cur.fetchall()
+        return [dict(row) for row in rows]
+
+    def execute(self, sql, params=()):
+        with self.session() as conn:
+            conn.cursor().execute(self._sql(sql), params)
+            conn.commit()
+
+    def executemany(self, sql, rows):
+        with self.session() as conn:
+            conn.cursor().executemany(self._sql(sql), rows)
+            conn.commit()
+
+    def list_tables(self, prefix=""):
+        raise NotImplementedError
+
+    def has_table(self, table):
+        return table in self.list_tables(table)
+
+    def _begin(self, cur):
+        pass
+
+    def _value(self, value):
+        return value
+
+    def _prepare_load(self, cur, table, columns, index_columns):
+        cur.execute(f"DELETE FROM `{table}`")
+
+    # Ganti isi tabel dalam satu transaksi; error per baris dikumpulkan, bukan menggagalkan semua
+    def load_rows(self, table, columns, rows, index_columns=()):
+        cols = ", ".join(f"`{col}`" for col in columns)
+        placeholders = ", ".join([self.placeholder] * len(columns))
+        sql = f"INSERT INTO `{table}` ({cols}) VALUES ({placeholders})"
+
+        errors = []
+        with self.session() as conn:
+            cur = conn.cursor()
+            self._begin(cur)
+            self._prepare_load(cur, table, columns, index_columns)
+            for label, row in rows:
+                try:
+                    cur.execute(sql, tuple(self._value(row.get(col)) for col in columns))
+                except Exception as e:
+                    errors.append((label, e))
+            conn.commit()
+        return errors
+
+class MySQLStorage(SQLStorage):
+    name = "mysql"
+
+    def __init__(self, config):
+        self.config = config
+
+    # Koneksi putus / timeout di tengah query dihitung sebagai kegagalan breaker, bukan hanya saat connect
+    @contextmanager
+    def session(self, timeout=None):
+        conn = db_breaker.connect({**self.config, "read_timeout": timeout} if timeout else self.config)
+        try:
+            yield conn
+        except Exception as e:
+            if is_db_down(e):
+                db_breaker.record_failure()
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            raise
+        finally:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def list_tables(self, prefix=""):
+        rows = self.query("SHOW TABLES")
+        tables = [list(row.values())[0] for row in rows]
+        return [t for t in tables if t.startswith(prefix)]
+
+class SQLiteStorage(SQLStorage):
+    name = "sqlite"
+    placeholder = "?"
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._tables = None
+        self._tables_lock = threading.Lock()            # load_rows dan list_tables jalan di banyak thread
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.execute("CREATE TABLE IF NOT EXISTS `_replica_meta` (`table_name` TEXT PRIMARY KEY, `refreshed_at` TEXT)")
+
+    # Satu koneksi per thread (WAL: pembaca tidak terblokir saat import menulis)
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+            self._local.conn = conn
+        return conn
+
+    # Timeout lewat progress handler: query dihentikan SQLite ("interrupted"), thread langsung bebas
+    @contextmanager
+    def session(self, timeout=None):
+        conn = self._connection()
+        if timeout:
+            deadline = time.monotonic() + timeout
+            conn.set_progress_handler(lambda: time.monotonic() > deadline, 10000)
+        try:
+            yield conn
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            if timeout:
+                conn.set_progress_handler(None, 0)
+
+    # Autocommit dimatikan manual agar DROP/CREATE/INSERT replika atomik bagi pembaca
+    def _begin(self, cur):
+        cur.execute("BEGIN IMMEDIATE")
+
+    # Kolom replika bertipe TEXT; Decimal/datetime dari pymysql tidak bisa di-bind sqlite3
+    def _value(self, value):
+        return None if value is None else str(value)
+
+    def list_tables(self, prefix=""):
+        with self._tables_lock:
+            if self._tables is None:
+                rows = self.query("SELECT name FROM sqlite_master WHERE type = 'table'")
+                self._tables = {row["name"] for row in rows}
+            tables = list(self._tables)
+        return sorted(t for t in tables if t.startswith(prefix) and t != "_replica_meta")
+
+    def _prepare_load(self, cur, table, columns, index_columns):
+        cur.execute(f"DROP TABLE IF EXISTS `{table}`")
+        cur.execute(f"CREATE TABLE `{table}` ({', '.join(f'`{col}` TEXT' for col in columns)})")
+        for col in index_columns:
+            cur.execute(f"CREATE INDEX `idx_{table}_{col}` ON `{table}` (LOWER(TRIM(`{col}`)))")
+        cur.execute(
+            "INSERT OR REPLACE INTO `_replica_meta` (`table_name`, `refreshed_at`) VALUES (?, ?)",
+            (table, datetime.now().strftime("%Y-%m-%d %H:%M"))
+        )
+
+    def load_rows(self, table, columns, rows, index_columns=()):
+        errors = super().load_rows(table, columns, rows, index_columns)
+        with self._tables_lock:
+            if self._tables is not None:
+                self._tables.add(table)
+        return errors
+
+    def drop_table(self, table):
+        with self.session() as conn:
+            cur = conn.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            cur.execute(f"DROP TABLE IF EXISTS `{table}`")
+            cur.execute("DELETE FROM `_replica_meta` WHERE `table_name` = ?", (table,))
+            conn.commit()
+        with self._tables_lock:
+            if self._tables is not None:
+                self._tables.discard(table)
+
+    def refreshed_at(self, table):
+        rows = self.query("SELECT `refreshed_at` FROM `_replica_meta` WHERE `table_name` = %s", (table,))
+        return rows[0]["refreshed_at"] if rows else "-"
+
+_replica = SQLiteStorage(SQLITE_PATH)
+_primary = _replica if STORAGE_BACKEND == "sqlite" else MySQLStorage(DB_CONFIG)
+
+# Storage utama: tujuan tulis semua import
+def get_storage():
+    return _primary
+
+# Replika baca lokal (SQLite); sama dengan storage utama bila STORAGE_BACKEND=sqlite
+def get_replica():
+    return _replica
+
+# Salin hasil import ke replika (dipanggil setelah storage utama berhasil ditulis).
+# Bila gagal (termasuk sebagian baris), tabel replika dibuang agar pembacaan kembali ke storage utama
+def refresh_replica(table, columns, rows):
+    if _replica is _primary:
+        return
+    try:
+        errors = _replica.load_rows(table, columns, enumerate(rows), index_columns_for(table))
+        if errors:
+            label, error = errors[0]
+            raise RuntimeError(f"{len(errors)} baris gagal disalin (baris {label}: {error})")
+    except Exception:
+        logger.exception(f"Gagal memperbarui replika {table}")
+        try:
+            _replica.drop_table(table)
+        except Exception:
+            logger.exception(f"Gagal membuang replika usang {table}")
+
+_seed_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="replica-seed")
+_seeding = set()
+_seeding_lock = threading.Lock()
+
+# Salin satu tabel penuh dari storage utama ke replika; jalan di thread seed, error cukup dicatat
+def seed_replica(table):
+    try:
+        rows = _primary.query(f"SELECT * FROM `{table}`")
+        if rows:
+            refresh_replica(table, list(rows[0].keys()), rows)
+    except Exception as e:
+        logger.warning(f"Gagal mengisi replika {table}: {e}")
+    finally:
+        with _seeding_lock:
+            _seeding.discard(table)
+
+def _schedule_seed(table):
+    if _replica is _primary or db_breaker.is_open:
+        return
+    with _seeding_lock:
+        if table in _seeding:
+            return
+        _seeding.add(table)
+    _seed_executor.submit(seed_replica, table)
+
+# Storage untuk jalur baca: replika bila tabel sudah ada. Bila belum, query ini dilayani storage utama
+# dan replika diisi di background (salinan penuh tidak pernah ditunggu handler)
+def read_storage(table):
+    if _replica.has_table(table):
+        return _replica
+    _schedule_seed(table)
+    return _primary
+
+# Daftar tabel dari storage utama + replika; tetap jalan saat MySQL mati
+def list_tables(prefix):
+    tables = set(_replica.list_tables(prefix))
+    try:
+        tables.update(_primary.list_tables(prefix))
+    except Exception as e:
+        if not is_db_down(e) or not tables:
+            raise
+    return sorted(tables)
+
+# Nama tabel <prefix><witel> hanya bila tabelnya memang ada; input user tidak pernah
+# langsung jadi identifier SQL
+def witel_table(prefix, witel):
+    table = f"{prefix}{witel.strip().lower()}"
+    return table if table in list_tables(prefix) else None
+
+def table_exists(table):
+    return _replica.has_table(table) or table in list_tables(table)
+
+_primary_ok = True
+_health_thread = None
+_health_lock = threading.Lock()
+
+# Replika tidak pernah menyentuh MySQL, jadi kesehatan storage utama dicek thread terpisah;
+# kegagalannya ikut dihitung circuit breaker lewat MySQLStorage.session
+def _health_loop():
+    global _primary_ok
+    while True:
+        if db_breaker.is_open:
+            ok = False
+        else:
+            try:
+                _primary.query("SELECT 1")
+                ok = True
+            except Exception as e:
+                logger.warning(f"Storage utama tidak tersedia: {e}")
+                ok = False
+        _primary_ok = ok
+        time.sleep(PRIMARY_CHECK_SECONDS)
+
+# Hanya membaca status terakhir; tidak pernah menunggu jaringan di event loop
+def primary_available():
+    global _health_thread
+    if _replica is _primary:
+        return True
+    if _health_thread is None:
+        with _health_lock:
+            if _health_thread is None:
+                _health_thread = threading.Thread(target=_health_loop, name="primary-health", daemon=True)
+                _health_thread.start()
+    return _primary_ok and not db_breaker.is_open
+
+def stale_notice(table):
+    if primary_available():
+        return ""
+    return (
+        f"⚠️ Database utama tidak tersedia. Data dari replika lokal per "
+        f"{_replica.refreshed_at(table)} (bisa tidak terbaru)."
+    )
@@ -1,13 +1,22 @@
 # handler/base_command.py
 
+import logging
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import CallbackContext, CommandHandler, CallbackQueryHandler
 
+from database.breaker import is_db_down
+
 # Import register_handler dari tiap modul perintah
 from handler.cekftm_command    import register_handler as register_cekgpon
 from handler.cekmetro_command   import register_handler as register_cekmetro
 from handler.inputftm_command   import register_handler as register_inputftm
 from handler.inputmetro_command import register_handler as register_inputmetro
+from handler.topologimetro_command import register_handler as register_topologimetro
+from handler.okupansiftm_command import register_handler as register_okupansiftm
+from handler.cari_command import register_handler as register_cari
+from handler.profiler import register_handler as register_profile, instrument_handlers
+
+logger = logging.getLogger(__name__)
 
 # /start
 async def start(update: Update, context: CallbackContext) -> None:
@@ -27,8 +36,14 @@ async def help_callback(update: Update, context: CallbackContext) -> None:
         "📃 *Daftar Perintah yang Tersedia:*\n\n"
         "🔍 /cekgpon     - Cek data GPON\n"
         "🚇 /cekmetro    - Cek data Metro\n"
+        "🔎 /cari        - Cari hostname di semua WITEL\n"
         "📥 /inputftm    - Input data FTM\n"
         "📥 /inputmetro  - Input data Metro\n"
+        "🖧 /gponmetro   - GPON di belakang router Metro\n"
+        "📊 /bwmetro     - Bandwidth uplink per router/LACP\n"
+        "⚠️ /singlehomed - GPON dengan satu uplink router\n"
+        "🧵 /okupansiftm - Okupansi feeder per STO/segmen/ODC\n"
+        "🩺 /profile     - Profiling bot (khusus admin)\n"
         "❌ /end         - Mengakhiri sesi bot\n"
         "↩️ /kembali     - Kembali ke menu utama\n",
         parse_mode="Markdown"
@@ -45,6 +60,23 @@ async def button_handler(update: Update, context: CallbackContext) -> None:
 async def end(update: Update, context: CallbackContext) -> None:
     await update.message.reply_text("✅ Sesi bot telah diakhiri. Terima kasih!")
 
+# Error handler global: log error dan beri tahu user, termasuk saat database mati
+async def error_handler(update: object, context: CallbackContext) -> None:
+    logger.error("Error saat memproses update", exc_info=context.error)
+
+    message = update.effective_message if isinstance(update, Update) else None
+    if message is None:
+        return
+
+    if is_db_down(context.error):
+        text = "❌ Database sedang tidak tersedia. Silakan coba lagi beberapa saat lagi."
+    else:
+        text = "❌ Terjadi kesalahan saat memproses perintah. Silakan ulangi."
+    try:
+        await message.reply_text(text)
+    except Exception:
+        logger.exception("Gagal mengirim pesan error ke user")
+
 # /kembali
 async def kembali(update: Update, context: CallbackContext) -> None:
     await start(update, context)
@@ -60,8 +92,18 @@ def register_handler(app) -> None:
     register_cekmetro(app)
     register_inputftm(app)
     register_inputmetro(app)
+    register_topologimetro(app)
+    register_okupansiftm(app)
+    register_cari(app)
 
     # Inline button callback & utility
     app.add_handler(CallbackQueryHandler(button_handler))
     app.add_handler(CommandHandler("end", end))
     app.add_handler(CommandHandler("kembali", kembali))
+
+    # Profiling on-demand: bungkus semua handler di atas, lalu daftarkan /profile sendiri
+    instrument_handlers(app)
+    register_profile(app)
+
+    # Error handler
+    app.add_error_handler(error_handler)
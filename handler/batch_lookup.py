@@ -0,0 +1,140 @@
+import os
+import re
+import logging
+import tempfile
+import pandas as pd
+from telegram.ext import ConversationHandler
+
+from database.storage import read_storage, stale_notice, witel_table
+
+logger = logging.getLogger(__name__)
+
+# Batas jumlah hostname per permintaan batch
+MAX_HOSTNAMES = 500
+
+STATUS_FOUND = "DITEMUKAN"
+STATUS_NOT_FOUND = "TIDAK DITEMUKAN"
+
+# Pecah teks (per baris / koma / titik koma) menjadi daftar hostname unik, urutan dipertahankan
+def parse_hostnames(text):
+    names = []
+    seen = set()
+    for part in re.split(r"[\n,;]+", text or ""):
+        name = part.strip()
+        if name and name.lower() not in seen:
+            seen.add(name.lower())
+            names.append(name)
+    return names
+
+def is_batch_text(text):
+    return len(parse_hostnames(text)) > 1
+
+# Baca daftar hostname dari lampiran .txt atau .xlsx (kolom pertama)
+async def read_hostname_document(doc):
+    suffix = os.path.splitext(doc.file_name or "")[1].lower()
+    if suffix not in (".txt", ".xlsx"):
+        raise ValueError("File harus berformat .txt atau .xlsx")
+
+    file = await doc.get_file()
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+        path = tmp.name
+    try:
+        await file.download_to_drive(path)
+        if suffix == ".txt":
+            with open(path, encoding="utf-8", errors="ignore") as f:
+                return parse_hostnames(f.read())
+        try:
+            df = pd.read_excel(path, header=None, usecols=[0], dtype=str)
+            values = df[0].dropna()
+        except Exception as e:
+            logger.warning(f"Gagal membaca lampiran hostname: {e}")
+            raise ValueError("File .xlsx tidak bisa dibaca atau sheet kosong") from e
+        return parse_hostnames("\n".join(values))
+    finally:
+        os.remove(path)
+
+# Satu query set-based untuk seluruh daftar hostname
+def fetch_by_hostnames(storage, table, column, hostnames):
+    keys = [h.lower() for h in hostnames]
+    placeholders = ", ".join(["%s"] * len(keys))
+    return storage.query(f"""
+        SELECT * FROM `{table}`
+        WHERE LOWER(TRIM(`{column}`)) IN ({placeholders})
+    """, keys)
+
+# Gabungkan hasil menjadi satu file Excel: setiap input ditandai ditemukan / tidak
+def build_report(hostnames, rows, column):
+    matches = {}
+    for row in rows:
+        matches.setdefault((row.get(column) or "").strip().lower(), []).append(row)
+
+    records = []
+    not_found = []
+    for name in hostnames:
+        found = matches.get(name.lower())
+        if not found:
+            not_found.append(name)
+            records.append({"input": name, "status": STATUS_NOT_FOUND})
+            continue
+        for row in found:
+            records.append({"input": name, "status": STATUS_FOUND, **row})
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx") as tmp:
+        path = tmp.name
+    pd.DataFrame(records).to_excel(path, index=False)
+    return path, not_found
+
+async def send_batch_report(message, hostnames, rows, column, title):
+    path, not_found = build_report(hostnames, rows, column)
+    try:
+        found = len(hostnames) - len(not_found)
+        text = f"✅ {title}: {found} dari {len(hostnames)} hostname ditemukan."
+        if not_found:
+            preview = "\n".join(f"• {name}" for name in not_found[:20])
+            more = f"\n… dan {len(not_found) - 20} lainnya" if len(not_found) > 20 else ""
+            text += f"\n\n⚠️ Tidak ditemukan:\n{preview}{more}"
+        # Teks biasa: hostname dari user bisa berisi karakter Markdown (`, _, *)
+        await message.reply_text(text)
+
+        with open(path, "rb") as f:
+            await message.reply_document(document=f, filename="hasil_cek_batch.xlsx",
+                                         caption="📎 Hasil pencarian lengkap per hostname")
+    finally:
+        os.remove(path)
+
+# Cek banyak hostname sekaligus (teks multi-baris atau lampiran .txt/.xlsx) di tabel <prefix><witel>
+async def handle_batch(update, context, hostnames, prefix, column, title) -> int:
+    if not hostnames:
+        await update.message.reply_text("⚠️ Tidak ada hostname yang bisa dibaca.")
+        return ConversationHandler.END
+    if len(hostnames) > MAX_HOSTNAMES:
+        await update.message.reply_text(f"⚠️ Maksimal {MAX_HOSTNAMES} hostname per permintaan.")
+        return ConversationHandler.END
+
+    witel = context.user_data.get("witel", "").lower()
+
+    try:
+        table_name = witel_table(prefix, witel)
+        if table_name is None:
+            await update.message.reply_text("⚠️ WITEL tidak dikenal.")
+            return ConversationHandler.END
+        results = fetch_by_hostnames(read_storage(table_name), table_name, column, hostnames)
+    except Exception as e:
+        logger.exception("DB Error saat query batch")
+        await update.message.reply_text(f"❌ Terjadi kesalahan saat query DB: {e}")
+        return ConversationHandler.END
+
+    notice = stale_notice(table_name)
+    if notice:
+        await update.message.reply_text(notice)
+
+    await send_batch_report(update.message, hostnames, results, column, f"{title} {witel.upper()} (semua STO)")
+    return ConversationHandler.END
+
+async def handle_batch_document(update, context, prefix, column, title) -> int:
+    try:
+        hostnames = await read_hostname_document(update.message.document)
+    except ValueError as e:
+        await update.message.reply_text(f"❌ {e}")
+        return ConversationHandler.END
+    return await handle_batch(update, context, hostnames, prefix, column, title)
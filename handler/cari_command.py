@@ -0,0 +1,169 @@
+import os
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from telegram import Update
+from telegram.constants import ParseMode
+from telegram.error import BadRequest
+from telegram.ext import ContextTypes, CommandHandler
+
+from database.storage import list_tables, read_storage, stale_notice
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# Satu shard = satu tabel per WITEL; kolom hostname yang dicari per jenis tabel
+SHARDS = {
+    "data_ftm_": ("FTM", "nama_gpon"),
+    "data_uplink_": ("Metro", "gpon_hostname"),
+}
+
+SHARD_TIMEOUT = float(os.getenv("CARI_SHARD_TIMEOUT", "5"))
+SEARCH_WORKERS = int(os.getenv("CARI_WORKERS", "8"))
+MIN_TERM_LEN = 3
+ROWS_PER_SHARD = 500
+MAX_SHOWN = 25
+
+# Pool terpisah agar pencarian lintas WITEL tidak menghabiskan executor default (import file)
+_executor = ThreadPoolExecutor(max_workers=SEARCH_WORKERS, thread_name_prefix="cari")
+
+# Urutan relevansi: sama persis, awalan, lalu mengandung
+def rank(hostname, term):
+    hostname = hostname.strip().lower()
+    if hostname == term:
+        return 0
+    if hostname.startswith(term):
+        return 1
+    return 2
+
+# Wildcard LIKE dari input user diperlakukan sebagai karakter biasa (dipakai dengan ESCAPE '!')
+def like_escape(term):
+    return term.replace("!", "!!").replace("%", "!%").replace("_", "!_")
+
+# Markdown (v1) tidak bisa meng-escape backtick di dalam kode; ganti agar pesan tidak gagal dikirim
+def _code(text):
+    return "`" + str(text).replace("`", "'") + "`"
+
+def list_shards():
+    shards = []
+    for prefix, (kind, column) in SHARDS.items():
+        for table in list_tables(prefix):
+            shards.append((table, kind, column, table[len(prefix):].upper()))
+    return shards
+
+# Cari di satu tabel; hasil dikelompokkan per hostname (FTM punya banyak baris per GPON).
+# Diurutkan sama persis > awalan > mengandung sebelum LIMIT agar yang terpotong hanya yang paling lemah.
+# Timeout berlaku di level query (bukan asyncio) sehingga worker langsung bebas; tabel yang belum ada
+# di replika dilayani storage utama dan replikanya diisi di background oleh read_storage
+def search_shard(table, kind, column, witel, term):
+    key = f"LOWER(TRIM(`{column}`))"
+    pattern = like_escape(term)
+    started = time.monotonic()
+    try:
+        rows = read_storage(table).query(f"""
+            SELECT * FROM `{table}`
+            WHERE {key} LIKE %s ESCAPE '!'
+            ORDER BY CASE WHEN {key} = %s THEN 0 WHEN {key} LIKE %s ESCAPE '!' THEN 1 ELSE 2 END, {key}
+            LIMIT {ROWS_PER_SHARD}
+        """, (f"%{pattern}%", term, f"{pattern}%"), timeout=SHARD_TIMEOUT)
+    except Exception as e:
+        if time.monotonic() - started >= SHARD_TIMEOUT:
+            raise TimeoutError(f"{table} melebihi {SHARD_TIMEOUT:g} detik") from e
+        raise
+
+    hits = {}
+    for row in rows:
+        hostname = (row.get(column) or "").strip()
+        hit = hits.setdefault(hostname.lower(), {
+            "rank": rank(hostname, term), "hostname": hostname, "kind": kind,
+            "witel": witel, "stos": set(), "rows": 0, "detail": "",
+        })
+        hit["rows"] += 1
+        if row.get("sto"):
+            hit["stos"].add(row["sto"].strip().upper())
+        if kind == "FTM" and row.get("ip"):
+            hit["detail"] = f"IP {row['ip']}"
+        elif kind == "Metro" and row.get("neighbor_hostname"):
+            hit["detail"] = f"→ {_code(' '.join(row['neighbor_hostname'].split()))}"
+    return list(hits.values()), len(rows) >= ROWS_PER_SHARD
+
+def format_hit(hit):
+    sto = "/".join(sorted(hit["stos"])) or "-"
+    detail = f", {hit['detail']}" if hit["detail"] else ""
+    return f"• {_code(hit['hostname'])} — {hit['witel']} {sto} ({hit['kind']}, {hit['rows']} baris{detail})"
+
+def render(term, hits, done, total, failed, truncated, notice):
+    hits = sorted(hits, key=lambda h: (h["rank"], h["hostname"].lower(), h["kind"], h["witel"]))
+    status = "✅ Selesai" if done == total else "🔎 Mencari"
+    lines = [f"{status} {_code(term)} — {len(hits)} hostname dari {done}/{total} tabel"]
+    if notice:
+        lines.append(notice)
+    lines.append("")
+    lines.extend(format_hit(h) for h in hits[:MAX_SHOWN])
+    if len(hits) > MAX_SHOWN:
+        lines.append(f"… dan {len(hits) - MAX_SHOWN} lainnya, perjelas kata kunci.")
+    if done == total and not hits:
+        lines.append("⚠️ Data tidak ditemukan.")
+    if truncated:
+        lines.append(f"\n✂️ Dipotong ({ROWS_PER_SHARD} baris/tabel): " + ", ".join(truncated))
+    if failed:
+        lines.append("\n⚠️ Tidak terjawab: " + ", ".join(failed))
+    return "\n".join(lines)
+
+async def run_shard(shard, term):
+    table, kind, column, witel = shard
+    loop = asyncio.get_running_loop()
+    try:
+        hits, truncated = await loop.run_in_executor(_executor, search_shard, table, kind, column, witel, term)
+        return shard, hits, truncated, None
+    except TimeoutError:
+        return shard, [], False, "timeout"
+    except Exception as e:
+        logger.warning(f"Gagal mencari di {table}: {e}")
+        return shard, [], False, "error"
+
+# /cari <potongan hostname>: cari di semua WITEL (FTM + Metro) sekaligus
+async def cari(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    term = " ".join(context.args).strip().lower()
+    if len(term) < MIN_TERM_LEN:
+        await update.message.reply_text(f"ℹ️ Format: /cari <potongan hostname> (minimal {MIN_TERM_LEN} karakter)")
+        return
+
+    try:
+        shards = await asyncio.get_running_loop().run_in_executor(_executor, list_shards)
+    except Exception as e:
+        logger.exception("DB Error saat ambil daftar tabel")
+        await update.message.reply_text(f"❌ Gagal mengambil daftar tabel: {e}")
+        return
+    if not shards:
+        await update.message.reply_text("⚠️ Belum ada data FTM/Metro di database.")
+        return
+
+    status = await update.message.reply_text(f"🔎 Mencari \"{term}\" di {len(shards)} tabel...")
+
+    # Hasil dikirim bertahap: pesan status diperbarui setiap ada shard yang selesai
+    hits, failed, truncated, notice = [], [], [], ""
+    tasks = [run_shard(shard, term) for shard in shards]
+    for done, next_result in enumerate(asyncio.as_completed(tasks), 1):
+        (table, kind, _, witel), shard_hits, cut, error = await next_result
+        hits.extend(shard_hits)
+        if cut:
+            truncated.append(f"{kind} {witel}")
+        if error:
+            failed.append(f"{kind} {witel} ({error})")
+        elif not notice:
+            notice = stale_notice(table)
+
+        # Lewati edit yang tidak menambah apa pun, kecuali update terakhir
+        if not shard_hits and not error and done < len(shards):
+            continue
+        try:
+            await status.edit_text(render(term, hits, done, len(shards), failed, truncated, notice), parse_mode=ParseMode.MARKDOWN)
+        except BadRequest as e:
+            if "not modified" not in str(e).lower():
+                logger.warning(f"Gagal memperbarui hasil /cari: {e}")
+
+def register_handler(app) -> None:
+    app.add_handler(CommandHandler("cari", cari))
@@ -1,6 +1,4 @@
-import os
 import logging
-import pymysql
 from dotenv import load_dotenv
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.constants import ParseMode
@@ -12,6 +10,10 @@ from telegram.ext import (
     MessageHandler,
     filters,
 )
+from handler.batch_lookup import (
+    parse_hostnames, is_batch_text, handle_batch, handle_batch_document,
+)
+from database.storage import list_tables, read_storage, stale_notice
 
 # Load .env
 load_dotenv()
@@ -20,19 +22,12 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# DB Config
-DB_CONFIG = {
-    "host": os.getenv("DB_HOST", "localhost"),
-    "user": os.getenv("DB_USER", "root"),
-    "password": os.getenv("DB_PASS", ""),
-    "db": os.getenv("DB_NAME", "tlkm"),
-    "cursorclass": pymysql.cursors.DictCursor,
-    "charset": "utf8mb4",
-}
-
 # Conversation States
 ASK_WITEL, ASK_DATEL, ASK_HOSTNAME = range(3)
 
+# Tabel, kolom hostname, dan judul laporan untuk cek batch
+BATCH_TARGET = ("data_ftm_", "nama_gpon", "Cek FTM")
+
 # MarkdownV2 escaper
 def escape_md(text: str) -> str:
     escape_chars = r"\_*[]()~`>#+-=|{}.!<>"
@@ -41,18 +36,13 @@ def escape_md(text: str) -> str:
 # STEP 1: Mulai command /cekftm
 async def start_cekftm(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     try:
-        conn = pymysql.connect(**DB_CONFIG)
-        with conn.cursor() as cur:
-            cur.execute("SHOW TABLES")
-            tables = [list(row.values())[0] for row in cur.fetchall()]
-            witel_list = [t.replace("data_ftm_", "").upper() for t in tables if t.startswith("data_ftm_")]
+        tables = list_tables("data_ftm_")
     except Exception as e:
         logger.exception("DB Error saat ambil WITEL")
         await update.message.reply_text(f"❌ Gagal mengambil daftar WITEL: {e}")
         return ConversationHandler.END
-    finally:
-        conn.close()
 
+    witel_list = [t.replace("data_ftm_", "").upper() for t in tables if t.startswith("data_ftm_")]
     keyboard = [[InlineKeyboardButton(witel, callback_data=f"select_witel|{witel}")] for witel in witel_list]
 
     await update.message.reply_text(
@@ -69,19 +59,17 @@ async def handle_witel(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
     _, witel = query.data.split("|", 1)
     context.user_data["witel"] = witel
 
+    table_name = f"data_ftm_{witel.lower()}"
     try:
-        conn = pymysql.connect(**DB_CONFIG)
-        with conn.cursor() as cur:
-            table_name = f"data_ftm_{witel.lower()}"
-            cur.execute(f"SELECT DISTINCT sto FROM `{table_name}`")
-            sto_rows = cur.fetchall()
-            sto_list = sorted({row["sto"].upper() for row in sto_rows if row["sto"]})
+        sto_rows = read_storage(table_name).query(f"SELECT DISTINCT sto FROM `{table_name}`")
+        sto_list = sorted({row["sto"].upper() for row in sto_rows if row["sto"]})
     except Exception as e:
         logger.exception("DB Error saat ambil STO")
         await query.edit_message_text(f"❌ Gagal mengambil daftar STO: {e}")
         return ConversationHandler.END
-    finally:
-        conn.close()
+
+    notice = stale_notice(table_name)
+    notice = escape_md(notice) + "\n\n" if notice else ""
 
     keyboard = []
     row = []
@@ -94,7 +82,7 @@ async def handle_witel(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
         keyboard.append(row)
 
     await query.edit_message_text(
-        f"📌 WITEL: *{escape_md(witel)}*\n\nSilakan pilih *STO*: ",
+        notice + f"📌 WITEL: *{escape_md(witel)}*\n\nSilakan pilih *STO*: ",
         reply_markup=InlineKeyboardMarkup(keyboard),
         parse_mode=ParseMode.MARKDOWN_V2
     )
@@ -110,33 +98,35 @@ async def handle_datel(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
     witel = context.user_data.get("witel", "-")
 
     await query.edit_message_text(
-        f"📌 WITEL: *{escape_md(witel)}*\n🏢 STO: *{escape_md(sto)}*\n\nSilakan masukkan *nama GPON* yang ingin dicari:",
+        f"📌 WITEL: *{escape_md(witel)}*\n🏢 STO: *{escape_md(sto)}*\n\nSilakan masukkan *nama GPON* yang ingin dicari:\n\nUntuk banyak hostname sekaligus, kirim satu per baris atau lampirkan file \\.txt/\\.xlsx\\.",
         parse_mode=ParseMode.MARKDOWN_V2
     )
     return ASK_HOSTNAME
 
 # STEP 4: Input nama GPON → tampilkan hasil
 async def handle_hostname(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    if is_batch_text(update.message.text):
+        return await handle_batch(update, context, parse_hostnames(update.message.text), *BATCH_TARGET)
+
     hostname_input = update.message.text.strip().lower()
     witel = context.user_data.get("witel", "").lower()
     sto = context.user_data.get("sto", "").lower()
     table_name = f"data_ftm_{witel}"
 
     try:
-        conn = pymysql.connect(**DB_CONFIG)
-        with conn.cursor() as cur:
-            cur.execute(f"""
-                SELECT * FROM `{table_name}`
-                WHERE LOWER(TRIM(sto)) = %s
-                AND LOWER(TRIM(nama_gpon)) LIKE %s
-            """, (sto, f"%{hostname_input}%"))
-            results = cur.fetchall()
+        results = read_storage(table_name).query(f"""
+            SELECT * FROM `{table_name}`
+            WHERE LOWER(TRIM(sto)) = %s
+            AND LOWER(TRIM(nama_gpon)) LIKE %s
+        """, (sto, f"%{hostname_input}%"))
     except Exception as e:
         logger.exception("DB Error saat query GPON")
         await update.message.reply_text(f"❌ Terjadi kesalahan saat query DB: {e}")
         return ConversationHandler.END
-    finally:
-        conn.close()
+
+    notice = stale_notice(table_name)
+    if notice:
+        await update.message.reply_text(notice)
 
     if not results:
         await update.message.reply_text("⚠️ Data tidak ditemukan.")
@@ -163,6 +153,10 @@ async def handle_hostname(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 
     return ConversationHandler.END
 
+# Lampiran .txt/.xlsx berisi daftar hostname
+async def handle_hostname_file(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    return await handle_batch_document(update, context, *BATCH_TARGET)
+
 # Daftarkan handler ke aplikasi utama
 def register_handler(app) -> None:
     conv = ConversationHandler(
@@ -170,7 +164,10 @@ def register_handler(app) -> None:
         states={
             ASK_WITEL: [CallbackQueryHandler(handle_witel, pattern=r"^select_witel\|")],
             ASK_DATEL: [CallbackQueryHandler(handle_datel, pattern=r"^select_datel\|")],
-            ASK_HOSTNAME: [MessageHandler(filters.TEXT & ~filters.COMMAND, handle_hostname)],
+            ASK_HOSTNAME: [
+                MessageHandler(filters.TEXT & ~filters.COMMAND, handle_hostname),
+                MessageHandler(filters.Document.ALL, handle_hostname_file),
+            ],
         },
         fallbacks=[],
         allow_reentry=True,
@@ -1,6 +1,5 @@
-import os
+import re
 import logging
-import pymysql
 from dotenv import load_dotenv
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.constants import ParseMode
@@ -12,6 +11,11 @@ from telegram.ext import (
     MessageHandler,
     filters,
 )
+from handler.batch_lookup import (
+    parse_hostnames, is_batch_text, handle_batch, handle_batch_document,
+)
+from handler.validation import BW_PATTERN
+from database.storage import list_tables, read_storage, stale_notice, table_exists
 
 # Load .env
 load_dotenv()
@@ -20,20 +24,11 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# DB Config
-DB_CONFIG = {
-    "host": os.getenv("DB_HOST", "localhost"),
-    "user": os.getenv("DB_USER", "root"),
-    "password": os.getenv("DB_PASS", ""),
-    "db": os.getenv("DB_NAME", "tlkm"),
-    "cursorclass": pymysql.cursors.DictCursor,
-    "charset": "utf8mb4",
-}
-
 # State
 ASK_WITEL, ASK_DATEL, ASK_HOSTNAME = range(3)
 
-WITEL_OPTIONS = ["MLG", "MNZ", "KDI"]
+# Tabel, kolom hostname, dan judul laporan untuk cek batch
+BATCH_TARGET = ("data_uplink_", "gpon_hostname", "Cek Metro")
 
 def escape_md(text: str) -> str:
     escape_chars = r"\_*[]()~`>#+-=|{}.!<>"
@@ -46,7 +41,20 @@ async def start_cekmetro(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 
     logger.info(f"[STATE] start_cekmetro oleh user {user_id}")
 
-    keyboard = [[InlineKeyboardButton(witel, callback_data=f"select_witel|{witel}")] for witel in WITEL_OPTIONS]
+    # Daftar WITEL diambil dari tabel yang ada (sama dengan /cekftm), bukan hardcode
+    try:
+        tables = list_tables("data_uplink_")
+    except Exception as e:
+        logger.exception("DB Error saat ambil WITEL")
+        await message.reply_text(f"❌ Gagal mengambil daftar WITEL: {e}")
+        return ConversationHandler.END
+
+    witel_list = [t.replace("data_uplink_", "").upper() for t in tables]
+    if not witel_list:
+        await message.reply_text("⚠️ Belum ada data Metro untuk WITEL mana pun.")
+        return ConversationHandler.END
+
+    keyboard = [[InlineKeyboardButton(witel, callback_data=f"select_witel|{witel}")] for witel in witel_list]
     await message.reply_text(
         "🚇 Silakan pilih *WITEL* untuk cek Metro:",
         reply_markup=InlineKeyboardMarkup(keyboard),
@@ -63,25 +71,22 @@ async def handle_witel(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
 
     logger.info(f"[STATE] handle_witel: {witel}")
 
+    table_name = f"data_uplink_{witel.lower()}"
     try:
-        conn = pymysql.connect(**DB_CONFIG)
-        with conn.cursor() as cur:
-            table_name = f"data_uplink_{witel.lower()}"
-            cur.execute("SHOW TABLES")
-            all_tables = [list(row.values())[0] for row in cur.fetchall()]
-            if table_name not in all_tables:
-                await query.edit_message_text("⚠️ Tabel data untuk WITEL ini belum tersedia di database.")
-                return ConversationHandler.END
-
-            cur.execute(f"SELECT DISTINCT sto FROM `{table_name}`")
-            sto_rows = cur.fetchall()
-            sto_list = sorted({row["sto"].upper() for row in sto_rows if row["sto"]})
-        conn.close()
+        if not table_exists(table_name):
+            await query.edit_message_text("⚠️ Tabel data untuk WITEL ini belum tersedia di database.")
+            return ConversationHandler.END
+
+        sto_rows = read_storage(table_name).query(f"SELECT DISTINCT sto FROM `{table_name}`")
+        sto_list = sorted({row["sto"].upper() for row in sto_rows if row["sto"]})
     except Exception as e:
         logger.exception("DB Error saat ambil STO")
         await query.edit_message_text(f"❌ Gagal mengambil daftar STO: {e}")
         return ConversationHandler.END
 
+    notice = stale_notice(table_name)
+    notice = escape_md(notice) + "\n\n" if notice else ""
+
     if not sto_list:
         await query.edit_message_text("⚠️ Tidak ada data STO ditemukan di database.")
         return ConversationHandler.END
@@ -97,7 +102,7 @@ async def handle_witel(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
         keyboard.append(row)
 
     await query.edit_message_text(
-        f"📌 WITEL: *{escape_md(witel)}*\n\nSilakan pilih *STO*: ",
+        notice + f"📌 WITEL: *{escape_md(witel)}*\n\nSilakan pilih *STO*: ",
         reply_markup=InlineKeyboardMarkup(keyboard),
         parse_mode=ParseMode.MARKDOWN_V2
     )
@@ -118,6 +123,7 @@ async def handle_datel(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
         f"📌 WITEL: *{escape_md(witel)}*\n"
         f"🏢 STO: *{escape_md(sto)}*\n"
         "Silakan masukkan *gpon hostname* yang ingin dicari:"
+        "\n\nUntuk banyak hostname sekaligus, kirim satu per baris atau lampirkan file \\.txt/\\.xlsx\\."
     )
 
     await query.edit_message_text(
@@ -128,6 +134,9 @@ async def handle_datel(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
 
 # Masukkan GPON Hostname (pencarian berdasarkan gpon_hostname)
 async def handle_hostname(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    if is_batch_text(update.message.text):
+        return await handle_batch(update, context, parse_hostnames(update.message.text), *BATCH_TARGET)
+
     logger.info(f"[STATE] handle_hostname oleh user {update.effective_user.id}")
 
     hostname_input = update.message.text.strip().lower()
@@ -137,26 +146,24 @@ async def handle_hostname(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     table_name = f"data_uplink_{witel}"
 
     try:
-        conn = pymysql.connect(**DB_CONFIG)
-        with conn.cursor() as cur:
-            cur.execute("SHOW TABLES")
-            all_tables = [list(row.values())[0] for row in cur.fetchall()]
-            if table_name not in all_tables:
-                await update.message.reply_text("⚠️ Tabel tidak ditemukan untuk WITEL tersebut.")
-                return ConversationHandler.END
-
-            cur.execute(f"""
-                SELECT * FROM `{table_name}`
-                WHERE LOWER(TRIM(sto)) = %s
-                AND LOWER(TRIM(gpon_hostname)) LIKE %s
-            """, (sto, f"%{hostname_input}%"))
-            results = cur.fetchall()
-        conn.close()
+        if not table_exists(table_name):
+            await update.message.reply_text("⚠️ Tabel tidak ditemukan untuk WITEL tersebut.")
+            return ConversationHandler.END
+
+        results = read_storage(table_name).query(f"""
+            SELECT * FROM `{table_name}`
+            WHERE LOWER(TRIM(sto)) = %s
+            AND LOWER(TRIM(gpon_hostname)) LIKE %s
+        """, (sto, f"%{hostname_input}%"))
     except Exception as e:
         logger.exception("DB Error")
         await update.message.reply_text(f"❌ Terjadi kesalahan saat query DB: {e}")
         return ConversationHandler.END
 
+    notice = stale_notice(table_name)
+    if notice:
+        await update.message.reply_text(notice)
+
     if not results:
         await update.message.reply_text("⚠️ Data tidak ditemukan.")
         return ConversationHandler.END
@@ -195,20 +202,17 @@ async def handle_hostname(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     )
     return ConversationHandler.END
 
-# Hitung Bandwidth
+# Lampiran .txt/.xlsx berisi daftar hostname
+async def handle_hostname_file(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    return await handle_batch_document(update, context, *BATCH_TARGET)
+
+# Hitung Bandwidth (Mbps); format sama dengan validasi import: 1G, 10 Gbps, 100M, 100MB, 100
 def parse_bw(bw: str) -> float:
-    if not bw:
-        return 0
-    bw = bw.strip().upper().replace(" ", "")
-    try:
-        if "G" in bw:
-            return float(bw.replace("G", "")) * 1000
-        elif "M" in bw:
-            return float(bw.replace("M", ""))
-        else:
-            return float(bw)
-    except:
+    match = re.fullmatch(BW_PATTERN, (bw or "").strip(), re.IGNORECASE)
+    if not match:
         return 0
+    value = float(match["value"])
+    return value * 1000 if (match["unit"] or "").upper().startswith("G") else value
 
 async def hitung_total_bandwidth(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     query = update.callback_query
@@ -239,7 +243,10 @@ def register_handler(app) -> None:
         states={
             ASK_WITEL: [CallbackQueryHandler(handle_witel, pattern=r"^select_witel\|")],
             ASK_DATEL: [CallbackQueryHandler(handle_datel, pattern=r"^select_datel\|")],
-            ASK_HOSTNAME: [MessageHandler(filters.TEXT & ~filters.COMMAND, handle_hostname)],
+            ASK_HOSTNAME: [
+                MessageHandler(filters.TEXT & ~filters.COMMAND, handle_hostname),
+                MessageHandler(filters.Document.ALL, handle_hostname_file),
+            ],
         },
         fallbacks=[MessageHandler(filters.ALL, unknown_input)],
         allow_reentry=True,
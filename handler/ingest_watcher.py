@@ -0,0 +1,148 @@
+import os
+import re
+import shutil
+import asyncio
+import logging
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+from handler import inputftm_command, inputmetro_command
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# Konfigurasi folder drop (kosongkan INGEST_DIR untuk menonaktifkan watcher)
+INGEST_DIR = os.getenv("INGEST_DIR", "")
+INGEST_POLL_SECONDS = int(os.getenv("INGEST_POLL_SECONDS", "30"))
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "4"))
+ADMIN_CHAT_ID = os.getenv("ADMIN_CHAT_ID", "")
+
+# Nama file: ftm_<witel>*.xlsx atau metro_<witel>*.xlsx, contoh: ftm_mlg_20250728.xlsx
+# (<witel> harus salah satu WITEL_OPTIONS modul input)
+FILE_PATTERN = re.compile(r"^(ftm|metro)[_-]([a-z]+)", re.IGNORECASE)
+
+IMPORTERS = {
+    "ftm": inputftm_command,
+    "metro": inputmetro_command,
+}
+
+_watcher_task = None
+_executor = None
+
+def _move(path, folder):
+    target_dir = os.path.join(INGEST_DIR, folder)
+    os.makedirs(target_dir, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d%H%M%S")
+    target = os.path.join(target_dir, f"{stamp}_{os.path.basename(path)}")
+    shutil.move(path, target)
+    return target
+
+# Kumpulkan file yang sudah selesai ditulis (ukuran tidak berubah sejak polling sebelumnya)
+def scan_ready_files(sizes):
+    ready = {}
+    seen = {}
+    for name in os.listdir(INGEST_DIR):
+        path = os.path.join(INGEST_DIR, name)
+        match = FILE_PATTERN.match(name)
+        if not os.path.isfile(path) or not name.lower().endswith(".xlsx") or not match:
+            continue
+        size = os.path.getsize(path)
+        seen[path] = size
+        if sizes.get(path) != size:
+            continue
+        key = (match.group(1).lower(), match.group(2).lower())
+        ready.setdefault(key, []).append(path)
+    sizes.clear()
+    sizes.update(seen)
+
+    # Satu tabel hanya di-load sekali per putaran: file terbaru di urutan terakhir
+    for paths in ready.values():
+        paths.sort(key=os.path.getmtime)
+    return ready
+
+# Jalankan satu tabel di worker thread: file terbaru di-load, sisanya dilewati
+def process_group(kind, witel, paths):
+    importer = IMPORTERS[kind]
+    lines = []
+    if witel.upper() not in importer.WITEL_OPTIONS:
+        for path in paths:
+            _move(path, "failed")
+            lines.append(f"❌ {os.path.basename(path)}: WITEL '{witel.upper()}' tidak dikenal ({', '.join(importer.WITEL_OPTIONS)})")
+        return lines
+
+    *older, latest = paths
+    for path in older:
+        _move(path, "processed")
+        lines.append(f"⏭️ {os.path.basename(path)}: dilewati (ada file lebih baru)")
+
+    name = os.path.basename(latest)
+    try:
+        result = importer.import_workbook(latest, witel)
+    except Exception as e:
+        logger.exception(f"Gagal memproses {name}")
+        _move(latest, "failed")
+        lines.append(f"❌ {name}: {e}")
+        return lines
+
+    # Kolom kurang atau semua baris ditolak validasi: tidak ada yang ter-load
+    nothing_loaded = result["missing"] or result["total"] == result["rejected"]
+    target = _move(latest, "failed" if nothing_loaded else "processed")
+    if result["failed_rows"]:
+        with open(f"{target}.gagal.txt", "w", encoding="utf-8") as f:
+            f.write("\n".join(result["failed_rows"]) + "\n")
+    lines.append(f"📥 {name} ({kind.upper()} {witel.upper()})\n{importer.summary_text(result)}")
+    return lines
+
+async def watch_directory(app, executor):
+    loop = asyncio.get_running_loop()
+    sizes = {}
+    logger.info(f"Watcher ingest aktif di {INGEST_DIR} (interval {INGEST_POLL_SECONDS}s)")
+
+    while True:
+        try:
+            ready = scan_ready_files(sizes)
+            if ready:
+                jobs = [
+                    loop.run_in_executor(executor, process_group, kind, witel, paths)
+                    for (kind, witel), paths in ready.items()
+                ]
+                reports = await asyncio.gather(*jobs)
+                await notify_admin(app, [line for lines in reports for line in lines])
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Watcher ingest error")
+        await asyncio.sleep(INGEST_POLL_SECONDS)
+
+async def notify_admin(app, lines):
+    logger.info("Ingest selesai:\n" + "\n".join(lines))
+    if not ADMIN_CHAT_ID:
+        return
+    try:
+        await app.bot.send_message(chat_id=ADMIN_CHAT_ID, text=("🗂️ Ringkasan Ingest Folder\n\n" + "\n\n".join(lines))[:4000])
+    except Exception:
+        logger.exception("Gagal mengirim ringkasan ingest ke admin")
+
+# Dipasang sebagai post_init / post_stop Application
+async def start_ingest_watcher(app) -> None:
+    global _watcher_task, _executor
+    if not INGEST_DIR:
+        return
+    os.makedirs(INGEST_DIR, exist_ok=True)
+    _executor = ThreadPoolExecutor(max_workers=INGEST_WORKERS, thread_name_prefix="ingest")
+    _watcher_task = asyncio.get_running_loop().create_task(watch_directory(app, _executor))
+
+# Tidak menunggu import yang sedang jalan: shutdown bot tidak boleh tertahan di event loop
+async def stop_ingest_watcher(app) -> None:
+    global _watcher_task, _executor
+    if _watcher_task:
+        _watcher_task.cancel()
+        try:
+            await _watcher_task
+        except asyncio.CancelledError:
+            pass
+        _watcher_task = None
+    if _executor:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -2,13 +2,17 @@ import os
 import logging
 import tempfile
 import pandas as pd
-import pymysql
 from dotenv import load_dotenv
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, InputFile
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import (
     Application, CommandHandler, CallbackContext, ConversationHandler,
     CallbackQueryHandler, MessageHandler, filters
 )
+from handler.template_cache import send_template
+from handler.profiler import run_in_thread
+from database.storage import get_storage, refresh_replica, index_columns_for
+from handler.validation import missing_columns, drop_empty_rows, validate_rows
+from handler.rollup import FeederRollup, store_rollup
 
 # Load ENV dan logging
 load_dotenv()
@@ -28,34 +32,39 @@ COLUMNS = [
     "kapasitas_kabel_feeder_utama", "nama_odc"
 ]
 
-# DB config
-DB_CONFIG = {
-    "host": os.getenv("DB_HOST", "localhost"),
-    "user": os.getenv("DB_USER", "root"),
-    "password": os.getenv("DB_PASS", ""),
-    "db": os.getenv("DB_NAME", "tlkm"),
-    "cursorclass": pymysql.cursors.DictCursor,
-    "charset": "utf8mb4"
+# Aturan validasi sebelum data ditulis ke DB
+VALIDATION_RULES = {
+    "ip_columns": ["ip"],
+    "ranges": {
+        "card": (0, 99),
+        "port": (0, 999),
+        "no_core_feeder": (1, 9999),
+        "kapasitas_kabel_feeder_utama": (1, 9999),
+    },
+    "key_columns": ["nama_segmen_feeder_utama", "no_core_feeder"],
+    "max_length": 255,
 }
 
-def get_connection():
-    return pymysql.connect(**DB_CONFIG)
-
-def clear_table(table):
-    with get_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute(f"DELETE FROM `{table}`")
-        conn.commit()
-
-def insert_mysql(table, data):
-    cols = ", ".join([f"`{col}`" for col in COLUMNS])
-    placeholders = ", ".join(["%s"] * len(COLUMNS))
-    sql = f"INSERT INTO `{table}` ({cols}) VALUES ({placeholders})"
-    values = tuple(data.get(col, None) for col in COLUMNS)
-    with get_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute(sql, values)
-        conn.commit()
+ROLLUP_COLUMNS = ["level", "nama", "core_terpakai", "core_tercatat", "kapasitas"]
+
+# Simpan rekap okupansi feeder ke tabel ringkasan rekap_ftm_<witel>
+def save_rollup(witel, rows):
+    table = f"rekap_ftm_{witel}"
+    storage = get_storage()
+    storage.execute(f"""
+        CREATE TABLE IF NOT EXISTS `{table}` (
+            `level` VARCHAR(10) NOT NULL,
+            `nama` VARCHAR(255) NOT NULL,
+            `core_terpakai` INT NOT NULL,
+            `core_tercatat` INT NOT NULL,
+            `kapasitas` INT NOT NULL,
+            PRIMARY KEY (`level`, `nama`)
+        )
+    """)
+    errors = storage.load_rows(table, ROLLUP_COLUMNS, enumerate(rows))
+    if errors:
+        raise errors[0][1]
+    refresh_replica(table, ROLLUP_COLUMNS, rows)
 
 def clean(val):
     return None if pd.isna(val) else str(val).strip()
@@ -81,15 +90,93 @@ async def handle_witel(update: Update, context: CallbackContext) -> int:
         parse_mode="Markdown"
     )
 
-    contoh_path = "E:/Telkom/Telkom_Activity.bot/Input FTM.xlsx"
-    if os.path.exists(contoh_path):
-        with open(contoh_path, "rb") as f:
-            await context.bot.send_document(chat_id=query.message.chat_id, document=InputFile(f), filename=os.path.basename(contoh_path))
-    else:
-        await context.bot.send_message(chat_id=query.message.chat_id, text="⚠️ Contoh file tidak ditemukan di server.")
+    try:
+        await send_template(context.bot, query.message.chat_id, "input_ftm", COLUMNS, "Input FTM.xlsx")
+    except Exception:
+        logger.exception("Gagal mengirim template")
+        await context.bot.send_message(chat_id=query.message.chat_id, text="⚠️ Contoh file gagal dikirim.")
 
     return ASK_FILE
 
+# Parsing + validasi + load satu workbook FTM (dipakai /inputftm dan watcher folder)
+def import_workbook(path, witel):
+    witel = witel.strip().lower()
+    df_raw = pd.read_excel(path, header=0)
+    df_raw.columns = [col.strip().lower().replace(" ", "_").replace("-", "_") for col in df_raw.columns]
+
+    # Atasi duplikat kolom no_port_panel
+    if df_raw.columns.tolist().count("no_port_panel") == 2:
+        cols = []
+        counter = 0
+        for col in df_raw.columns:
+            if col == "no_port_panel":
+                if counter == 0:
+                    cols.append("no_port_panel_eakses")
+                else:
+                    cols.append("no_port_panel_oakses")
+                counter += 1
+            else:
+                cols.append(col)
+        df_raw.columns = cols
+
+    df = df_raw.copy()
+    df["witel"] = witel
+    table = f"data_ftm_{witel}"
+
+    result = {"witel": witel, "missing": [], "total": 0, "rejected": 0, "count": 0, "failed": 0, "failed_rows": []}
+
+    # Validasi kolom
+    result["missing"] = missing_columns(df, COLUMNS)
+    if result["missing"]:
+        return result
+
+    # Validasi seluruh baris sebelum ada data yang ditulis
+    df = drop_empty_rows(df, [col for col in COLUMNS if col != "witel"])
+    result["total"] = len(df)
+    df, failed_rows = validate_rows(df, COLUMNS, VALIDATION_RULES)
+    result["rejected"] = len(failed_rows)
+    result["failed_rows"] = failed_rows
+    if df.empty:
+        return result
+
+    # Ganti isi tabel dalam satu transaksi di storage utama
+    rows = [(i, {col: clean(row.get(col)) for col in COLUMNS}) for i, row in df.iterrows()]
+    errors = dict(get_storage().load_rows(table, COLUMNS, rows, index_columns_for(table)))
+
+    rollup = FeederRollup()
+    inserted = []
+    for i, data in rows:
+        if i in errors:
+            result["failed"] += 1
+            failed_rows.append(f"Baris {i+2}: {errors[i]}")
+            logger.warning(f"Gagal insert baris {i+2}: {errors[i]}")
+            continue
+        rollup.add(data)
+        inserted.append(data)
+        result["count"] += 1
+    refresh_replica(table, COLUMNS, inserted)
+
+    # Rekap okupansi feeder dari baris yang berhasil masuk
+    summary = rollup.summary()
+    store_rollup(witel, summary)
+    try:
+        save_rollup(witel, summary)
+    except Exception:
+        logger.exception("Gagal menyimpan rekap feeder")
+
+    return result
+
+def summary_text(result):
+    if result["missing"]:
+        return f"❌ Kolom berikut tidak ditemukan di file:\n{', '.join(result['missing'])}"
+    text = (
+        f"📊 Ringkasan Input Data FTM:\n- Total Baris: {result['total']}\n- Ditolak Validasi: {result['rejected']}"
+        f"\n- Berhasil: {result['count']}\n- Gagal: {result['failed']}"
+    )
+    if result["total"] == result["rejected"]:
+        text += "\n\n❌ Tidak ada baris valid. Data lama di database tidak diubah."
+    return text
+
 async def handle_file(update: Update, context: CallbackContext) -> int:
     doc = update.message.document
     if not doc.file_name.endswith(".xlsx"):
@@ -103,59 +190,15 @@ async def handle_file(update: Update, context: CallbackContext) -> int:
         path = tmp.name
         await file.download_to_drive(path)
 
-    failed_rows = []
     try:
-        df_raw = pd.read_excel(path, header=0)
-        df_raw.columns = [col.strip().lower().replace(" ", "_").replace("-", "_") for col in df_raw.columns]
-
-        # Atasi duplikat kolom no_port_panel
-        if df_raw.columns.tolist().count("no_port_panel") == 2:
-            cols = []
-            counter = 0
-            for col in df_raw.columns:
-                if col == "no_port_panel":
-                    if counter == 0:
-                        cols.append("no_port_panel_eakses")
-                    else:
-                        cols.append("no_port_panel_oakses")
-                    counter += 1
-                else:
-                    cols.append(col)
-            df_raw.columns = cols
-
-        df = df_raw.copy()
-
-        witel = context.user_data.get("witel", "").strip().lower()
-        df["witel"] = witel
-        table = f"data_ftm_{witel}"
-
-        # Validasi kolom
-        missing = [col for col in COLUMNS if col not in df.columns]
-        if missing:
-            await update.message.reply_text(f"❌ Kolom berikut tidak ditemukan di file:\n{', '.join(missing)}")
-            return ConversationHandler.END
-
-        clear_table(table)
-
-        count, failed = 0, 0
-        for i, row in df.iterrows():
-            data = {col: clean(row.get(col)) for col in COLUMNS}
-            try:
-                insert_mysql(table, data)
-                count += 1
-            except Exception as e:
-                failed += 1
-                failed_rows.append(f"Baris {i+2}: {e}")
-                logger.warning(f"Gagal insert baris {i+2}: {e}")
-
-        await update.message.reply_text(
-            f"📊 Ringkasan Input Data FTM:\n- Total Baris: {len(df)}\n- Berhasil: {count}\n- Gagal: {failed}",
-            parse_mode="Markdown"
-        )
+        witel = context.user_data.get("witel", "")
+        result = await run_in_thread(import_workbook, path, witel)
+
+        await update.message.reply_text(summary_text(result))
 
-        if failed_rows:
+        if result["failed_rows"]:
             with tempfile.NamedTemporaryFile(delete=False, suffix=".txt", mode="w", encoding="utf-8") as f:
-                for line in failed_rows:
+                for line in result["failed_rows"]:
                     f.write(line + "\n")
                 failed_path = f.name
 
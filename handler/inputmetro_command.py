@@ -2,13 +2,17 @@ import os
 import logging
 import tempfile
 import pandas as pd
-import pymysql
 from dotenv import load_dotenv
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, InputFile
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import (
     Application, CommandHandler, CallbackContext, ConversationHandler,
     CallbackQueryHandler, MessageHandler, filters
 )
+from handler.template_cache import send_template
+from handler.profiler import run_in_thread
+from database.storage import get_storage, refresh_replica, index_columns_for
+from handler.validation import missing_columns, drop_empty_rows, validate_rows
+from handler.topology import build_topology
 
 # Load ENV dan logging
 load_dotenv()
@@ -26,40 +30,14 @@ COLUMNS = [
     "bw", "sfp", "vlan_sip", "vlan_internet", "Keterangan", "OTN-CROSS METRO"
 ]
 
-# Konfigurasi DB
-DB_CONFIG = {
-    "host": os.getenv("DB_HOST", "localhost"),
-    "user": os.getenv("DB_USER", "root"),
-    "password": os.getenv("DB_PASS", ""),
-    "db": os.getenv("DB_NAME", "tlkm"),
-    "cursorclass": pymysql.cursors.DictCursor,
-    "charset": "utf8mb4"
+# Aturan validasi sebelum data ditulis ke DB
+VALIDATION_RULES = {
+    "ip_columns": ["gpon_ip"],
+    "unit_columns": ["bw"],
+    "key_columns": ["gpon_hostname", "gpon_intf", "neighbor_hostname", "neighbor_intf"],
+    "max_length": 255,
 }
 
-def get_connection():
-    return pymysql.connect(**DB_CONFIG)
-
-def clear_table(table):
-    with get_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute(f"DELETE FROM `{table}`")
-        conn.commit()
-
-def insert_mysql(table, data):
-    cols = ", ".join([f"`{col}`" for col in COLUMNS])
-    placeholders = ", ".join(["%s"] * len(COLUMNS))
-
-    sql = f"""
-        INSERT INTO `{table}` ({cols})
-        VALUES ({placeholders})
-    """
-    values = tuple(data.get(col, None) for col in COLUMNS)
-
-    with get_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute(sql, values)
-        conn.commit()
-
 # Start /inputmetro
 async def start_inputmetro(update: Update, context: CallbackContext) -> int:
     keyboard = [[InlineKeyboardButton(w, callback_data=f"witel|{w}")] for w in WITEL_OPTIONS]
@@ -82,12 +60,11 @@ async def handle_witel(update: Update, context: CallbackContext) -> int:
         parse_mode="Markdown"
     )
 
-    contoh_path = "E:/Telkom/Telkom_Activity.bot/Uplink GPON-Metro Malang (rev).xlsx"
-    if os.path.exists(contoh_path):
-        with open(contoh_path, "rb") as f:
-            await context.bot.send_document(chat_id=query.message.chat_id, document=InputFile(f), filename=os.path.basename(contoh_path))
-    else:
-        await context.bot.send_message(chat_id=query.message.chat_id, text="⚠️ Contoh file tidak ditemukan di server.")
+    try:
+        await send_template(context.bot, query.message.chat_id, "input_metro", COLUMNS, "Input Metro.xlsx")
+    except Exception:
+        logger.exception("Gagal mengirim template")
+        await context.bot.send_message(chat_id=query.message.chat_id, text="⚠️ Contoh file gagal dikirim.")
 
     return ASK_FILE
 
@@ -95,6 +72,63 @@ async def handle_witel(update: Update, context: CallbackContext) -> int:
 def clean(val):
     return None if pd.isna(val) else str(val).strip()
 
+# Parsing + validasi + load satu workbook Metro (dipakai /inputmetro dan watcher folder)
+def import_workbook(path, witel):
+    witel = witel.strip().lower()
+    df = pd.read_excel(path)
+    df.columns = [c.strip().lower().replace(" ", "_").replace("-", "_") for c in df.columns]
+    df = df.rename(columns={"otn_cross_metro": "OTN-CROSS METRO", "keterangan": "Keterangan"})
+
+    df["witel"] = witel
+    table = f"data_uplink_{witel}"
+
+    result = {"witel": witel, "missing": [], "total": 0, "rejected": 0, "count": 0, "failed": 0, "failed_rows": []}
+
+    # Validasi kolom
+    result["missing"] = missing_columns(df, COLUMNS)
+    if result["missing"]:
+        return result
+
+    # Validasi seluruh baris sebelum ada data yang ditulis
+    df = drop_empty_rows(df, [col for col in COLUMNS if col != "witel"])
+    result["total"] = len(df)
+    df, failed_rows = validate_rows(df, COLUMNS, VALIDATION_RULES)
+    result["rejected"] = len(failed_rows)
+    result["failed_rows"] = failed_rows
+    if df.empty:
+        return result
+
+    # Ganti isi tabel dalam satu transaksi di storage utama
+    rows = [(i, {col: clean(row.get(col)) for col in COLUMNS}) for i, row in df.iterrows()]
+    errors = dict(get_storage().load_rows(table, COLUMNS, rows, index_columns_for(table)))
+
+    inserted = []
+    for i, data in rows:
+        if i in errors:
+            result["failed"] += 1
+            failed_rows.append(f"Baris {i+2}: {errors[i]}")
+            logger.warning(f"Gagal insert baris {i+2}: {errors[i]}")
+            continue
+        inserted.append(data)
+        result["count"] += 1
+    refresh_replica(table, COLUMNS, inserted)
+
+    # Bangun ulang graf topologi dari baris yang berhasil masuk
+    build_topology(witel, inserted)
+
+    return result
+
+def summary_text(result):
+    if result["missing"]:
+        return f"❌ Kolom berikut tidak ditemukan di file:\n{', '.join(result['missing'])}"
+    text = (
+        f"📊 Ringkasan Input Data Metro:\n- Total Baris: {result['total']}\n- Ditolak Validasi: {result['rejected']}"
+        f"\n- Berhasil: {result['count']}\n- Gagal: {result['failed']}"
+    )
+    if result["total"] == result["rejected"]:
+        text += "\n\n❌ Tidak ada baris valid. Data lama di database tidak diubah."
+    return text
+
 # Handle upload file
 async def handle_file(update: Update, context: CallbackContext) -> int:
     doc = update.message.document
@@ -109,37 +143,15 @@ async def handle_file(update: Update, context: CallbackContext) -> int:
         path = tmp.name
         await file.download_to_drive(path)
 
-    failed_rows = []
     try:
-        df = pd.read_excel(path)
-        df.columns = [c.strip().lower().replace(" ", "_").replace("-", "_") for c in df.columns]
-        df = df.rename(columns={"otn_cross_metro": "OTN-CROSS METRO", "keterangan": "Keterangan"})
-
-        witel = context.user_data.get("witel", "").strip().lower()
-        df["witel"] = witel
-        table = f"data_uplink_{witel}"
-
-        clear_table(table)
-
-        count, failed = 0, 0
-        for i, row in df.iterrows():
-            data = {col: clean(row.get(col.replace(" ", "_").replace("-", "_").lower())) for col in COLUMNS}
-            try:
-                insert_mysql(table, data)
-                count += 1
-            except Exception as e:
-                failed += 1
-                failed_rows.append(f"Baris {i+2}: {e}")
-                logger.warning(f"Gagal insert baris {i+2}: {e}")
-
-        await update.message.reply_text(
-            f"📊 Ringkasan Input Data Metro:\n- Total Baris: {len(df)}\n- Berhasil: {count}\n- Gagal: {failed}",
-            parse_mode="Markdown"
-        )
-
-        if failed_rows:
+        witel = context.user_data.get("witel", "")
+        result = await run_in_thread(import_workbook, path, witel)
+
+        await update.message.reply_text(summary_text(result))
+
+        if result["failed_rows"]:
             with tempfile.NamedTemporaryFile(delete=False, suffix=".txt", mode="w", encoding="utf-8") as f:
-                for line in failed_rows:
+                for line in result["failed_rows"]:
                     f.write(line + "\n")
                 failed_path = f.name
 
@@ -0,0 +1,63 @@
+import logging
+from telegram import Update
+from telegram.ext import ContextTypes, CommandHandler
+
+from database.storage import read_storage, stale_notice, witel_table
+from handler.rollup import ROLLUPS, LEVELS, store_rollup, utilization
+from handler.topologimetro_command import send_lines
+
+logger = logging.getLogger(__name__)
+
+# Ambil rekap dari memori; setelah restart baca tabel ringkasan (bukan data_ftm_<witel>).
+# None bila WITEL tidak punya tabel data_ftm_<witel>
+def get_rollup(witel):
+    witel = witel.strip().lower()
+    if witel not in ROLLUPS:
+        if witel_table("data_ftm_", witel) is None:
+            return None
+        table = f"rekap_ftm_{witel}"
+        rows = read_storage(table).query(f"SELECT * FROM `{table}`")
+        store_rollup(witel, rows)
+    return ROLLUPS[witel]
+
+# /okupansiftm <witel> [sto|segmen|odc] [filter]
+async def okupansi_ftm(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    if not context.args:
+        await update.message.reply_text("ℹ️ Format: /okupansiftm <witel> [sto|segmen|odc] [filter nama]")
+        return
+
+    witel = context.args[0]
+    level = context.args[1].lower() if len(context.args) > 1 else "sto"
+    term = " ".join(context.args[2:]).strip().upper()
+    if level not in LEVELS:
+        await update.message.reply_text(f"⚠️ Level harus salah satu dari: {', '.join(LEVELS)}")
+        return
+
+    try:
+        rollup = get_rollup(witel)
+    except Exception as e:
+        logger.exception("DB Error saat ambil rekap feeder")
+        await update.message.reply_text(f"❌ Rekap feeder WITEL {witel.upper()} belum tersedia: {e}")
+        return
+    if rollup is None:
+        await update.message.reply_text("⚠️ WITEL tidak dikenal.")
+        return
+
+    notice = stale_notice(f"rekap_ftm_{witel.strip().lower()}")
+    if notice:
+        await update.message.reply_text(notice)
+
+    rows = [r for r in rollup[level] if term in r["nama"]]
+    if not rows:
+        await update.message.reply_text("⚠️ Data tidak ditemukan.")
+        return
+
+    lines = [
+        f"• `{r['nama']}`: {r['core_terpakai']}/{r['kapasitas'] or r['core_tercatat']} core "
+        f"({utilization(r):.1f}%)"
+        for r in rows
+    ]
+    await send_lines(update.message, f"🧵 *Okupansi Feeder per {level.upper()} — {witel.upper()}*", lines)
+
+def register_handler(app) -> None:
+    app.add_handler(CommandHandler("okupansiftm", okupansi_ftm))
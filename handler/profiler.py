@@ -0,0 +1,201 @@
+import io
+import os
+import time
+import pstats
+import asyncio
+import cProfile
+import logging
+import functools
+import tracemalloc
+from datetime import datetime
+from dotenv import load_dotenv
+from telegram import Update
+from telegram.ext import CallbackContext, CommandHandler, ConversationHandler
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# User ID yang boleh menjalankan /profile (dipisah koma); default ke ADMIN_CHAT_ID
+ADMIN_IDS = {
+    int(x) for x in os.getenv("ADMIN_IDS", os.getenv("ADMIN_CHAT_ID", "")).replace(" ", "").split(",")
+    if x.lstrip("-").isdigit()
+}
+
+DEFAULT_UPDATES = 20
+DEFAULT_SECONDS = 300
+MAX_SECONDS = 1800
+TOP_FUNCTIONS = 40
+TOP_ALLOCATIONS = 25
+
+# Sesi profiling aktif (hanya satu sekaligus)
+_session = None
+
+class ProfileSession:
+    def __init__(self, chat_id, max_updates, seconds):
+        self.chat_id = chat_id
+        self.max_updates = max_updates
+        self.seconds = seconds
+        self.started = time.monotonic()
+        self.profile = cProfile.Profile()
+        self.thread_profiles = []                       # profil kerja di asyncio.to_thread
+        self.update_ids = set()
+        self.depth = 0
+        self.timer = None
+        tracemalloc.start()
+
+    @property
+    def done(self):
+        return len(self.update_ids) >= self.max_updates
+
+    # Hanya aktif di thread event loop; callback bersarang tidak meng-enable dua kali
+    def enter(self, update):
+        if isinstance(update, Update):
+            self.update_ids.add(update.update_id)
+        if self.depth == 0:
+            self.profile.enable()
+        self.depth += 1
+
+    def exit(self):
+        self.depth -= 1
+        if self.depth == 0:
+            self.profile.disable()
+
+    def report(self):
+        elapsed = time.monotonic() - self.started
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ])
+        traced, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        out = io.StringIO()
+        out.write(f"Profil bot — {datetime.now():%Y-%m-%d %H:%M:%S}\n")
+        out.write(f"Durasi: {elapsed:.1f} detik, update diproses: {len(self.update_ids)}\n")
+        out.write(f"Memori ter-trace: {traced / 1024:.1f} KiB (puncak {peak / 1024:.1f} KiB)\n\n")
+
+        stats = pstats.Stats(self.profile, stream=out)
+        for profile in self.thread_profiles:
+            stats.add(profile)
+        out.write(f"=== Fungsi terberat (cumulative, top {TOP_FUNCTIONS}) ===\n")
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(TOP_FUNCTIONS)
+        out.write(f"=== Fungsi terberat (tottime, top {TOP_FUNCTIONS}) ===\n")
+        stats.sort_stats(pstats.SortKey.TIME).print_stats(TOP_FUNCTIONS)
+
+        out.write(f"=== Lokasi alokasi terbesar (top {TOP_ALLOCATIONS}) ===\n")
+        for i, stat in enumerate(snapshot.statistics("lineno")[:TOP_ALLOCATIONS], 1):
+            frame = stat.traceback[0]
+            out.write(f"{i:>2}. {frame.filename}:{frame.lineno} — {stat.size / 1024:.1f} KiB dalam {stat.count} blok\n")
+        return out.getvalue()
+
+def _profiled(callback):
+    @functools.wraps(callback)
+    async def wrapper(update, context):
+        session = _session
+        if session is None:
+            return await callback(update, context)
+        session.enter(update)
+        try:
+            return await callback(update, context)
+        finally:
+            session.exit()
+            if session.done and session is _session:
+                context.application.create_task(finish_profile(context.bot))
+    return wrapper
+
+def _instrument(handler):
+    if isinstance(handler, ConversationHandler):
+        for child in handler.entry_points + handler.fallbacks:
+            _instrument(child)
+        for handlers in handler.states.values():
+            for child in handlers:
+                _instrument(child)
+    elif not getattr(handler.callback, "_profiled", False):
+        handler.callback = _profiled(handler.callback)
+        handler.callback._profiled = True
+
+# Bungkus callback semua handler yang sudah terdaftar (termasuk state ConversationHandler)
+def instrument_handlers(app) -> None:
+    for handlers in app.handlers.values():
+        for handler in handlers:
+            _instrument(handler)
+
+# Pengganti asyncio.to_thread: kerja berat di thread (pandas, insert DB) ikut terprofil
+async def run_in_thread(func, *args):
+    session = _session
+    if session is None:
+        return await asyncio.to_thread(func, *args)
+
+    # Python >= 3.12: cProfile memakai sys.monitoring yang berlaku untuk semua thread, jadi
+    # profil kedua ditolak ("Another profiling tool is already active") dan tidak diperlukan
+    def run():
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            return func(*args)
+        try:
+            return func(*args)
+        finally:
+            profile.disable()
+            session.thread_profiles.append(profile)
+    return await asyncio.to_thread(run)
+
+async def finish_profile(bot) -> None:
+    global _session
+    session, _session = _session, None
+    if session is None:
+        return
+    if session.timer is not None and session.timer is not asyncio.current_task():
+        session.timer.cancel()
+
+    report = await asyncio.to_thread(session.report)
+    await bot.send_document(
+        chat_id=session.chat_id,
+        document=report.encode("utf-8"),
+        filename=f"profil_{datetime.now():%Y%m%d_%H%M%S}.txt",
+        caption=f"📎 Hasil profiling {len(session.update_ids)} update."
+    )
+
+async def _stop_after(bot, seconds):
+    await asyncio.sleep(seconds)
+    await finish_profile(bot)
+
+# /profile [jumlah update] [detik] | /profile stop
+async def profile_command(update: Update, context: CallbackContext) -> None:
+    global _session
+    if update.effective_user.id not in ADMIN_IDS:
+        await update.message.reply_text("⛔ Perintah ini hanya untuk admin.")
+        return
+
+    args = context.args
+    if args and args[0].lower() == "stop":
+        if _session is None:
+            await update.message.reply_text("ℹ️ Tidak ada profiling yang berjalan.")
+        else:
+            await finish_profile(context.bot)
+        return
+
+    if _session is not None:
+        await update.message.reply_text("⚠️ Profiling sedang berjalan. Gunakan /profile stop untuk mengakhiri.")
+        return
+
+    try:
+        max_updates = int(args[0]) if args else DEFAULT_UPDATES
+        seconds = int(args[1]) if len(args) > 1 else DEFAULT_SECONDS
+    except ValueError:
+        await update.message.reply_text("ℹ️ Format: /profile [jumlah update] [batas detik] atau /profile stop")
+        return
+    max_updates = max(1, max_updates)
+    seconds = min(max(1, seconds), MAX_SECONDS)
+
+    _session = ProfileSession(update.effective_chat.id, max_updates, seconds)
+    _session.timer = context.application.create_task(_stop_after(context.bot, seconds))
+    logger.info(f"Profiling dimulai oleh {update.effective_user.id}: {max_updates} update / {seconds} detik")
+    await update.message.reply_text(
+        f"⏱️ Profiling aktif untuk {max_updates} update berikutnya atau {seconds} detik. "
+        "Laporan akan dikirim sebagai dokumen."
+    )
+
+def register_handler(app) -> None:
+    app.add_handler(CommandHandler("profile", profile_command))
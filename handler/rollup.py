@@ -0,0 +1,72 @@
+from collections import defaultdict
+
+# Rekap okupansi feeder FTM per WITEL, dihitung bertahap saat /inputftm
+ROLLUPS = {}
+
+LEVELS = ("sto", "segmen", "odc")
+USED_STATUSES = {"USED", "TERPAKAI"}
+
+def _key(value):
+    return (value or "").strip().upper()
+
+def _number(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return 0
+
+class FeederRollup:
+    def __init__(self):
+        self.capacity = {}                              # segmen -> kapasitas kabel
+        self.segments = defaultdict(set)                # (level, nama) -> {segmen}
+        self.cores = defaultdict(set)                   # (level, nama) -> {(segmen, core)}
+        self.used = defaultdict(set)                    # (level, nama) -> {(segmen, core)} terpakai
+
+    # Dipanggil per baris yang berhasil di-insert
+    def add(self, row):
+        segment = _key(row.get("nama_segmen_feeder_utama"))
+        core = _key(row.get("no_core_feeder"))
+        if segment:
+            self.capacity[segment] = max(self.capacity.get(segment, 0), _number(row.get("kapasitas_kabel_feeder_utama")))
+
+        used = _key(row.get("status_feeder")) in USED_STATUSES
+        names = {"sto": _key(row.get("sto")), "segmen": segment, "odc": _key(row.get("nama_odc"))}
+        for level, name in names.items():
+            if not name:
+                continue
+            group = (level, name)
+            if segment:
+                self.segments[group].add(segment)
+            if core:
+                self.cores[group].add((segment, core))
+                if used:
+                    self.used[group].add((segment, core))
+
+    def summary(self):
+        rows = []
+        for (level, name) in self.cores.keys() | self.segments.keys():
+            rows.append({
+                "level": level,
+                "nama": name,
+                "core_terpakai": len(self.used[(level, name)]),
+                "core_tercatat": len(self.cores[(level, name)]),
+                "kapasitas": sum(self.capacity.get(s, 0) for s in self.segments[(level, name)]),
+            })
+        return rows
+
+# Simpan rekap per level, diurutkan dari utilisasi tertinggi
+def store_rollup(witel, rows):
+    by_level = {level: [] for level in LEVELS}
+    for row in rows:
+        row = dict(row)
+        for key in ("core_terpakai", "core_tercatat", "kapasitas"):
+            row[key] = _number(row[key])
+        by_level[row["level"]].append(row)
+    for level_rows in by_level.values():
+        level_rows.sort(key=lambda r: (utilization(r), r["core_terpakai"]), reverse=True)
+    ROLLUPS[witel.lower()] = by_level
+    return by_level
+
+def utilization(row):
+    total = row["kapasitas"] or row["core_tercatat"]
+    return row["core_terpakai"] / total * 100 if total else 0.0
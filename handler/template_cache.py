@@ -0,0 +1,72 @@
+import os
+import json
+import hashlib
+import logging
+import pandas as pd
+from telegram.error import TelegramError
+
+logger = logging.getLogger(__name__)
+
+# Lokasi cache template (file .xlsx + daftar file_id Telegram)
+TEMPLATE_DIR = os.getenv("TEMPLATE_DIR", "templates")
+FILE_ID_CACHE = os.path.join(TEMPLATE_DIR, "file_ids.json")
+
+# Kolom yang diisi otomatis oleh bot, tidak perlu ada di template
+AUTO_COLUMNS = {"witel"}
+
+def template_columns(columns):
+    return [col for col in columns if col not in AUTO_COLUMNS]
+
+def spec_hash(columns):
+    raw = json.dumps(template_columns(columns), ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:12]
+
+def load_file_ids():
+    try:
+        with open(FILE_ID_CACHE, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_file_ids(cache):
+    os.makedirs(TEMPLATE_DIR, exist_ok=True)
+    tmp_path = f"{FILE_ID_CACHE}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=2)
+    os.replace(tmp_path, FILE_ID_CACHE)
+
+# Buat file template dari definisi COLUMNS (nama file memuat hash spesifikasi kolom)
+def build_template(name, columns):
+    digest = spec_hash(columns)
+    path = os.path.join(TEMPLATE_DIR, f"{name}_{digest}.xlsx")
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(TEMPLATE_DIR, exist_ok=True)
+    # Hapus template lama dengan spesifikasi kolom yang berbeda
+    for old in os.listdir(TEMPLATE_DIR):
+        if old.startswith(f"{name}_") and old.endswith(".xlsx"):
+            os.remove(os.path.join(TEMPLATE_DIR, old))
+
+    pd.DataFrame(columns=template_columns(columns)).to_excel(path, index=False)
+    return path
+
+# Kirim template: pakai file_id Telegram bila masih valid, upload ulang bila belum ada / kolom berubah
+async def send_template(bot, chat_id, name, columns, filename):
+    digest = spec_hash(columns)
+    cache = load_file_ids()
+    entry = cache.get(name)
+
+    if entry and entry.get("hash") == digest:
+        try:
+            await bot.send_document(chat_id=chat_id, document=entry["file_id"], filename=filename)
+            return
+        except TelegramError as e:
+            logger.warning(f"file_id template {name} tidak valid, upload ulang: {e}")
+
+    path = build_template(name, columns)
+    with open(path, "rb") as f:
+        message = await bot.send_document(chat_id=chat_id, document=f, filename=filename)
+
+    cache[name] = {"hash": digest, "file_id": message.document.file_id}
+    save_file_ids(cache)
@@ -0,0 +1,136 @@
+import logging
+from telegram import Update
+from telegram.constants import ParseMode
+from telegram.ext import ContextTypes, CommandHandler
+
+from database.storage import read_storage, stale_notice, witel_table
+from handler.topology import TOPOLOGIES, build_topology, format_bw
+
+logger = logging.getLogger(__name__)
+
+# Batas aman panjang pesan Telegram
+MAX_MESSAGE_LEN = 3500
+
+# Ambil graf dari memori; bila belum ada (bot baru restart) bangun sekali dari storage.
+# None bila WITEL tidak punya tabel data_uplink_<witel>
+def get_topology(witel):
+    witel = witel.strip().lower()
+    if witel not in TOPOLOGIES:
+        table = witel_table("data_uplink_", witel)
+        if table is None:
+            return None
+        rows = read_storage(table).query(f"""
+            SELECT gpon_hostname, neighbor_hostname, neighbor_lacp, bw
+            FROM `{table}`
+        """)
+        build_topology(witel, rows)
+    return TOPOLOGIES[witel]
+
+async def send_lines(message, header, lines):
+    chunk = header
+    for line in lines:
+        if len(chunk) + len(line) + 1 > MAX_MESSAGE_LEN:
+            await message.reply_text(chunk, parse_mode=ParseMode.MARKDOWN)
+            chunk = ""
+        chunk += "\n" + line
+    if chunk:
+        await message.reply_text(chunk, parse_mode=ParseMode.MARKDOWN)
+
+async def load_or_reply(update: Update, witel):
+    try:
+        topo = get_topology(witel)
+    except Exception as e:
+        logger.exception("DB Error saat membangun topologi")
+        await update.message.reply_text(f"❌ Gagal memuat topologi WITEL {witel.upper()}: {e}")
+        return None
+    if topo is None:
+        await update.message.reply_text("⚠️ WITEL tidak dikenal.")
+        return None
+
+    notice = stale_notice(f"data_uplink_{witel.strip().lower()}")
+    if notice:
+        await update.message.reply_text(notice)
+    return topo
+
+# /gponmetro <witel> <router>: semua GPON di belakang router Metro
+async def gpon_behind_router(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    if len(context.args) < 2:
+        await update.message.reply_text("ℹ️ Format: /gponmetro <witel> <hostname router>")
+        return
+
+    witel, term = context.args[0], " ".join(context.args[1:])
+    topo = await load_or_reply(update, witel)
+    if topo is None:
+        return
+
+    neighbors = topo.find_neighbors(term)
+    if not neighbors:
+        await update.message.reply_text("⚠️ Router tidak ditemukan.")
+        return
+
+    for neighbor in neighbors:
+        gpons = topo.gpons_behind(neighbor)
+        lines = [f"• `{topo.name(g)}`" for g in gpons]
+        await send_lines(
+            update.message,
+            f"🖧 *{topo.name(neighbor)}* — {len(gpons)} GPON ({format_bw(topo.bw_by_neighbor[neighbor])})",
+            lines
+        )
+
+# /bwmetro <witel> [router]: total bandwidth uplink per router / per bundle LACP
+async def bandwidth_per_neighbor(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    if not context.args:
+        await update.message.reply_text("ℹ️ Format: /bwmetro <witel> [hostname router]")
+        return
+
+    witel = context.args[0]
+    topo = await load_or_reply(update, witel)
+    if topo is None:
+        return
+
+    if len(context.args) == 1:
+        lines = [
+            f"• `{topo.name(n)}`: {format_bw(bw)} ({len(topo.gpons_by_neighbor[n])} GPON)"
+            for n, bw in topo.ranking
+        ]
+        await send_lines(update.message, f"📊 *Bandwidth Uplink per Router — {witel.upper()}*", lines)
+        return
+
+    neighbors = topo.find_neighbors(" ".join(context.args[1:]))
+    if not neighbors:
+        await update.message.reply_text("⚠️ Router tidak ditemukan.")
+        return
+
+    for neighbor in neighbors:
+        lines = [
+            f"• LACP `{lacp}`: {format_bw(bw)} — {links} link, {gpons} GPON"
+            for lacp, bw, links, gpons in topo.bundles_of(neighbor)
+        ]
+        await send_lines(
+            update.message,
+            f"📊 *{topo.name(neighbor)}* — total {format_bw(topo.bw_by_neighbor[neighbor])}",
+            lines
+        )
+
+# /singlehomed <witel>: GPON yang hanya terhubung ke satu router Metro
+async def single_homed(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    if not context.args:
+        await update.message.reply_text("ℹ️ Format: /singlehomed <witel>")
+        return
+
+    witel = context.args[0]
+    topo = await load_or_reply(update, witel)
+    if topo is None:
+        return
+
+    if not topo.single_homed:
+        await update.message.reply_text("✅ Tidak ada GPON single-homed.")
+        return
+
+    lines = [f"• `{topo.name(g)}` → `{topo.name(n)}`" for g, n in topo.single_homed]
+    await send_lines(update.message, f"⚠️ *GPON Single-Homed — {witel.upper()}* ({len(lines)})", lines)
+
+def register_handler(app) -> None:
+    app.add_handler(CommandHandler("gponmetro", gpon_behind_router))
+    app.add_handler(CommandHandler("bwmetro", bandwidth_per_neighbor))
+    app.add_handler(CommandHandler("singlehomed", single_homed))
@@ -0,0 +1,88 @@
+import re
+from collections import defaultdict
+from handler.cekmetro_command import parse_bw
+
+# Graf topologi Metro per WITEL, dibangun saat /inputmetro (atau sekali dari DB setelah restart)
+TOPOLOGIES = {}
+
+# Neighbor lewat transport OTN ditulis "OTN <STO> <ID> <router>", kadang dengan baris baru
+OTN_PREFIX = re.compile(r"^OTN\s+\S+\s+\d+[\s-]+", re.IGNORECASE)
+
+def _key(name):
+    return (name or "").strip().upper()
+
+# Nama router neighbor: whitespace dirapikan dan prefix OTN dibuang, agar satu router = satu node
+def neighbor_name(name):
+    name = " ".join((name or "").split())
+    return OTN_PREFIX.sub("", name) or name
+
+def _lacp(value):
+    value = (value or "").strip()
+    if value.endswith(".0"):
+        value = value[:-2]
+    return value or "-"
+
+class MetroTopology:
+    def __init__(self, rows):
+        self.names = {}                                 # key -> nama asli
+        self.gpons_by_neighbor = defaultdict(set)       # neighbor -> {gpon}
+        self.neighbors_by_gpon = defaultdict(set)       # gpon -> {neighbor}
+        self.bw_by_neighbor = defaultdict(float)        # neighbor -> Mbps
+        self.bw_by_bundle = defaultdict(float)          # (neighbor, lacp) -> Mbps
+        self.links_by_bundle = defaultdict(int)         # (neighbor, lacp) -> jumlah link
+        self.gpons_by_bundle = defaultdict(set)         # (neighbor, lacp) -> {gpon}
+        self.bundles_by_neighbor = defaultdict(set)     # neighbor -> {lacp}
+
+        for row in rows:
+            self.add_link(row)
+
+        # Precompute: GPON yang hanya punya satu router neighbor
+        self.single_homed = sorted(
+            (gpon, next(iter(neighbors)))
+            for gpon, neighbors in self.neighbors_by_gpon.items() if len(neighbors) == 1
+        )
+        self.ranking = sorted(self.bw_by_neighbor.items(), key=lambda item: item[1], reverse=True)
+
+    def add_link(self, row):
+        neighbor_display = neighbor_name(row.get("neighbor_hostname"))
+        gpon, neighbor = _key(row.get("gpon_hostname")), _key(neighbor_display)
+        if not gpon or not neighbor:
+            return
+        self.names.setdefault(gpon, row["gpon_hostname"].strip())
+        self.names.setdefault(neighbor, neighbor_display)
+
+        bundle = (neighbor, _lacp(row.get("neighbor_lacp")))
+        bw = parse_bw(row.get("bw") or "")
+
+        self.gpons_by_neighbor[neighbor].add(gpon)
+        self.neighbors_by_gpon[gpon].add(neighbor)
+        self.bw_by_neighbor[neighbor] += bw
+        self.bw_by_bundle[bundle] += bw
+        self.links_by_bundle[bundle] += 1
+        self.gpons_by_bundle[bundle].add(gpon)
+        self.bundles_by_neighbor[neighbor].add(bundle[1])
+
+    def name(self, key):
+        return self.names.get(key, key)
+
+    # Cari router: semua yang mengandung term, exact match di urutan pertama
+    def find_neighbors(self, term):
+        term = _key(neighbor_name(term))
+        return sorted((n for n in self.gpons_by_neighbor if term in n), key=lambda n: (n != term, n))
+
+    def gpons_behind(self, neighbor):
+        return sorted(self.gpons_by_neighbor.get(neighbor, ()))
+
+    def bundles_of(self, neighbor):
+        return sorted(
+            (lacp, self.bw_by_bundle[(neighbor, lacp)], self.links_by_bundle[(neighbor, lacp)],
+             len(self.gpons_by_bundle[(neighbor, lacp)]))
+            for lacp in self.bundles_by_neighbor.get(neighbor, ())
+        )
+
+def build_topology(witel, rows):
+    TOPOLOGIES[witel.lower()] = MetroTopology(rows)
+    return TOPOLOGIES[witel.lower()]
+
+def format_bw(mbps):
+    return f"{mbps:.2f} Mbps" if mbps < 1000 else f"{mbps / 1000:.2f} Gbps"
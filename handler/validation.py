@@ -0,0 +1,69 @@
+import pandas as pd
+
+# Pola validasi (dipakai dengan Series.str.fullmatch)
+IP_PATTERN = r"(?:(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)\.){3}(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)"
+# Satu-satunya format bandwidth yang dikenal; dipakai juga oleh cekmetro_command.parse_bw
+BW_PATTERN = r"(?P<value>\d+(?:\.\d+)?)\s*(?P<unit>[GM](?:B|BPS)?)?"
+
+# Nilai pengisi di kolom IP untuk baris tanpa perangkat
+IP_PLACEHOLDERS = ["0", "-"]
+
+DEFAULT_MAX_LENGTH = 255
+
+def missing_columns(df, columns):
+    return [col for col in columns if col not in df.columns]
+
+# Buang baris yang seluruh kolom datanya kosong (sisa format Excel)
+def drop_empty_rows(df, columns):
+    subset = [col for col in columns if col in df.columns]
+    return df.dropna(how="all", subset=subset)
+
+def _as_text(df, columns):
+    text = pd.DataFrame(index=df.index)
+    for col in columns:
+        text[col] = df[col].astype("string").str.strip().replace("", pd.NA)
+    return text
+
+def _flag(mask, message):
+    return message.where(mask.fillna(False))
+
+# Validasi seluruh sheet sekaligus (vectorized), sebelum ada data yang ditulis ke DB.
+# rules: ip_columns, ranges {kolom: (min, max)}, unit_columns, key_columns, max_length
+def validate_rows(df, columns, rules):
+    text = _as_text(df, columns)
+    reasons = []
+
+    for col in rules.get("ip_columns", []):
+        bad = text[col].notna() & ~text[col].isin(IP_PLACEHOLDERS) & ~text[col].str.fullmatch(IP_PATTERN)
+        reasons.append(_flag(bad, f"{col} bukan IP valid: " + text[col]))
+
+    for col, (low, high) in rules.get("ranges", {}).items():
+        num = pd.to_numeric(text[col], errors="coerce")
+        bad = text[col].notna() & (num.isna() | (num < low) | (num > high) | (num % 1 != 0))
+        reasons.append(_flag(bad, f"{col} harus angka {low}-{high}: " + text[col]))
+
+    for col in rules.get("unit_columns", []):
+        bad = text[col].notna() & ~text[col].str.fullmatch(BW_PATTERN, case=False)
+        reasons.append(_flag(bad, f"{col} satuan tidak dikenali (contoh: 1G, 100M): " + text[col]))
+
+    max_length = rules.get("max_length", DEFAULT_MAX_LENGTH)
+    for col in columns:
+        bad = text[col].str.len() > max_length
+        reasons.append(_flag(bad, pd.Series(f"{col} melebihi {max_length} karakter", index=df.index)))
+
+    key_columns = rules.get("key_columns", [])
+    if key_columns:
+        keys = text[key_columns].apply(lambda s: s.str.lower())
+        bad = keys.notna().all(axis=1) & keys.duplicated(keep="first")
+        reasons.append(_flag(bad, pd.Series(f"duplikat ({', '.join(key_columns)})", index=df.index)))
+
+    if not reasons:
+        return df, []
+
+    problems = pd.concat(reasons, axis=1)
+    rejected = problems.notna().any(axis=1)
+    report = [
+        f"Baris {i+2}: " + "; ".join(problems.loc[i].dropna())
+        for i in problems.index[rejected]
+    ]
+    return df[~rejected], report
@@ -7,6 +7,7 @@ from telegram.ext import Application
 
 # Import fungsi register handler dari base_command
 from handler.base_command import register_handler
+from handler.ingest_watcher import start_ingest_watcher, stop_ingest_watcher
 
 def main():
     # Load environment variables
@@ -22,8 +23,14 @@ def main():
         level=logging.INFO
     )
 
-    # Bangun aplikasi bot Telegram
-    app = Application.builder().token(token).build()
+    # Bangun aplikasi bot Telegram (watcher folder ingest ikut jalan bila INGEST_DIR di-set)
+    app = (
+        Application.builder()
+        .token(token)
+        .post_init(start_ingest_watcher)
+        .post_stop(stop_ingest_watcher)
+        .build()
+    )
 
     # Daftarkan semua command dan conversation handler
     register_handler(app)